@@ -1,9 +1,10 @@
 import os
+from contextlib import contextmanager
 from typing import cast
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator
 from datetime import datetime, date
 from decimal import Decimal
-from sqlalchemy import create_engine, Column, String, Integer, Float, DateTime, Date, Boolean, DECIMAL, Text, ForeignKey, JSON
+from sqlalchemy import create_engine, Column, String, Integer, Float, DateTime, Date, Boolean, DECIMAL, Text, ForeignKey, JSON, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session, relationship
 from sqlalchemy.dialects.postgresql import UUID
@@ -39,11 +40,30 @@ def _ensure_ssl(url: str) -> str:
     return url
 
 
+def _engine_options(url: str) -> Dict[str, Any]:
+    """Pool and driver-specific engine options tuned for bulk inserts."""
+    options: Dict[str, Any] = {
+        "echo": False,
+        "insertmanyvalues_page_size": 10_000,
+        # Room for every filter combination of the tool queries in the compiled cache
+        "query_cache_size": 1200,
+    }
+    if url.startswith("postgresql"):
+        # One shared pool for all tool calls; drop stale or recycled server connections
+        options.update(pool_size=20, max_overflow=10, pool_pre_ping=True, pool_recycle=1800)
+    if "+psycopg2" in url:
+        options["executemany_mode"] = "values_plus_batch"
+    elif "+psycopg" in url:
+        # Statement shapes vary per insert batch; skip server-side prepare promotion
+        options["connect_args"] = {"prepare_threshold": None}
+    return options
+
+
 def _create_engine_with_fallback(url: str):
     """Create SQLAlchemy engine with psycopg3 preferred, fallback to psycopg2 if needed."""
     normalized = _ensure_psycopg_driver(_ensure_ssl(url))
     try:
-        return create_engine(normalized, echo=False)
+        return create_engine(normalized, **_engine_options(normalized))
     except Exception as e:
         # Fallback to psycopg2 driver if psycopg is missing/unavailable in the runtime
         if "+psycopg" in normalized or normalized.startswith("postgresql+psycopg"):
@@ -56,24 +76,34 @@ def _create_engine_with_fallback(url: str):
             logger.warning(
                 f"psycopg engine init failed ({str(e)[:120]}). Trying psycopg2 fallback."
             )
-            return create_engine(fallback, echo=False)
+            return create_engine(fallback, **_engine_options(fallback))
         except Exception:
             # Re-raise original error for clarity
             raise
 
 
 engine = _create_engine_with_fallback(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Keep loaded attributes after commit so callers can keep reading committed rows
+# without triggering a reload SELECT per instance.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 Base = declarative_base()
 
 
-def get_db() -> Session:
-    """Get database session"""
+@contextmanager
+def get_db() -> Iterator[Session]:
+    """Yield a database session that is closed even if the caller raises"""
     db = SessionLocal()
     try:
-        return db
+        yield db
     finally:
-        pass  # Session will be closed by caller
+        db.close()
+
+
+def _has_pg_trgm(ddl, target, bind, **kw) -> bool:
+    """Only emit trigram indexes on servers where pg_trgm is installed."""
+    if bind is None:
+        return True
+    return bind.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first() is not None
 
 
 # ========================
@@ -98,6 +128,16 @@ class EmployeeTable(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Trigram index so ilike('%name%') lookups avoid a sequential scan
+        Index(
+            "ix_employees_name_trgm",
+            "first_name", "last_name",
+            postgresql_using="gin",
+            postgresql_ops={"first_name": "gin_trgm_ops", "last_name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql", callable_=_has_pg_trgm),
+    )
+
 
 # ========================
 # Storage/Inventory Tables
@@ -121,6 +161,22 @@ class StorageItemTable(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        Index(
+            "ix_storage_items_name_trgm",
+            "item_name",
+            postgresql_using="gin",
+            postgresql_ops={"item_name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql", callable_=_has_pg_trgm),
+        # Partial index: only low-stock rows are stored, so alert scans stay tiny
+        Index(
+            "ix_storage_items_name_low_stock",
+            "item_name",
+            postgresql_where=text("is_low_stock"),
+            sqlite_where=text("is_low_stock = 1"),
+        ),
+    )
+
 
 # ========================
 # Recipe Tables
@@ -146,6 +202,15 @@ class RecipeTable(Base):
     # Relationship to ingredients
     ingredients = relationship("RecipeIngredientTable", back_populates="recipe")
 
+    __table_args__ = (
+        Index(
+            "ix_recipes_dish_name_trgm",
+            "dish_name",
+            postgresql_using="gin",
+            postgresql_ops={"dish_name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql", callable_=_has_pg_trgm),
+    )
+
 
 class RecipeIngredientTable(Base):
     __tablename__ = "recipe_ingredients"
@@ -164,6 +229,8 @@ class RecipeIngredientTable(Base):
     recipe = relationship("RecipeTable", back_populates="ingredients")
     storage_item = relationship("StorageItemTable")
 
+    __table_args__ = (Index("ix_recipe_ingredients_recipe_id", "recipe_id"),)
+
 
 # ========================
 # Daily Menu Tables
@@ -183,6 +250,17 @@ class DailyMenuTable(Base):
     # Relationship to menu items
     menu_items = relationship("DailyMenuItemTable", back_populates="daily_menu")
 
+    __table_args__ = (
+        Index("ix_daily_menus_date_location", "menu_date", "restaurant_location"),
+        # Location filters are ilike('%x%') lookups
+        Index(
+            "ix_daily_menus_location_trgm",
+            "restaurant_location",
+            postgresql_using="gin",
+            postgresql_ops={"restaurant_location": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql", callable_=_has_pg_trgm),
+    )
+
 
 class DailyMenuItemTable(Base):
     __tablename__ = "daily_menu_items"
@@ -207,11 +285,28 @@ class DailyMenuItemTable(Base):
     daily_menu = relationship("DailyMenuTable", back_populates="menu_items")
     recipe = relationship("RecipeTable")
 
+    __table_args__ = (
+        # Serves the menu join and its ORDER BY category, dish_name
+        Index("ix_daily_menu_items_menu_category_name", "menu_id", "category", "dish_name"),
+    )
+
 
 def create_tables():
     """Create all database tables"""
     try:
-        Base.metadata.create_all(bind=engine)
+        if engine.dialect.name == "postgresql":
+            try:
+                # Backs the gin_trgm_ops indexes used by the ilike filters
+                with engine.begin() as conn:
+                    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            except Exception as e:
+                logger.warning(f"pg_trgm unavailable, skipping trigram indexes: {str(e)[:120]}")
+        with engine.begin() as conn:
+            Base.metadata.create_all(bind=conn)
+            # create_all skips tables that already exist; add any missing indexes to them
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(bind=conn, checkfirst=True)
         logger.info("✅ Database tables created successfully")
     except Exception as e:
         logger.error(f"❌ Error creating database tables: {str(e)}")
@@ -1,38 +1,280 @@
+import atexit
 import sqlite3
 import json
-import uuid
+import os
+import queue
+import secrets
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Optional, Dict, Any, Tuple
-from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple, Iterator, Callable
+
+from src.utils.cache import TTLCache
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:  # stdlib fallback when orjson is not installed
+    _json_loads = json.loads
+
+
+# WAL lets readers proceed during writes; NORMAL sync is durable under WAL
+# with one fsync per checkpoint instead of per commit.
+PRAGMAS = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA busy_timeout=5000;
+PRAGMA temp_store=MEMORY;
+PRAGMA cache_size=-65536;
+PRAGMA mmap_size=268435456;
+"""
+
+# Hot statements are kept as constants so sqlite3's statement cache always hits.
+# Readers shape rows into one JSON array inside SQLite; json(tags) embeds the
+# stored array as a nested value rather than a re-encoded string.
+# Timestamps are computed by SQLite in local time, matching rows written by
+# earlier versions that used datetime.now().isoformat().
+# Rows of one batch share a timestamp, so rowid (insertion order) breaks ties.
+NOW_SQL = "strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')"
+INSERT_SQL = (
+    "INSERT INTO memories(id, thread_id, content, tags, importance, source, created_at, updated_at) "
+    f"VALUES(?,?,?,?,?,?,{NOW_SQL},{NOW_SQL})"
+)
+_JSON_ROWS = """
+SELECT json_group_array(json_object(
+    'id', id, 'content', content, 'tags', json(tags), 'importance', importance,
+    'source', source, 'created_at', created_at, 'updated_at', updated_at
+)) FROM ({inner})
+"""
+LIST_SQL = _JSON_ROWS.format(inner=(
+    "SELECT * FROM memories WHERE thread_id=? ORDER BY updated_at DESC, rowid DESC LIMIT ?"
+))
+LIST_BY_TAG_SQL = _JSON_ROWS.format(inner=(
+    "SELECT * FROM memories "
+    "WHERE thread_id=? AND EXISTS (SELECT 1 FROM json_each(memories.tags) t WHERE t.value=?) "
+    "ORDER BY updated_at DESC, rowid DESC LIMIT ?"
+))
+DELETE_SQL = "DELETE FROM memories WHERE id=? AND thread_id=?"
+SEARCH_SQL = _JSON_ROWS.format(inner="""
+    SELECT m.* FROM memories_fts f JOIN memories m ON m.rowid = f.rowid
+    WHERE memories_fts MATCH ? AND m.thread_id=?
+    ORDER BY bm25(memories_fts), m.rowid DESC LIMIT ?
+""")
+SEARCH_BY_TAG_SQL = _JSON_ROWS.format(inner="""
+    SELECT m.* FROM memories_fts f JOIN memories m ON m.rowid = f.rowid
+    WHERE memories_fts MATCH ? AND m.thread_id=?
+      AND EXISTS (SELECT 1 FROM json_each(m.tags) t WHERE t.value=?)
+    ORDER BY bm25(memories_fts), m.rowid DESC LIMIT ?
+""")
+# The trigram index cannot match fewer than 3 characters; short queries scan the thread
+SEARCH_SHORT_SQL = _JSON_ROWS.format(inner=(
+    "SELECT * FROM memories WHERE thread_id=? AND content LIKE ? ORDER BY updated_at DESC, rowid DESC LIMIT ?"
+))
+SEARCH_SHORT_BY_TAG_SQL = _JSON_ROWS.format(inner=(
+    "SELECT * FROM memories "
+    "WHERE thread_id=? AND content LIKE ? "
+    "AND EXISTS (SELECT 1 FROM json_each(memories.tags) t WHERE t.value=?) "
+    "ORDER BY updated_at DESC, rowid DESC LIMIT ?"
+))
 
 
 class MemoryStore:
-    def __init__(self, db_path: Path | str = Path("data/memories.sqlite")) -> None:
+    def __init__(self, db_path: Path | str = Path("data/memories.sqlite"), readers: int = 4) -> None:
         self.path = Path(db_path)
         self.path.parent.mkdir(exist_ok=True)
+        self._lock = threading.RLock()
+        self._closed = False
+        # Read results are cached per thread; writes bump the thread's version so
+        # stale entries are never hit again and simply age out of the TTL cache.
+        self._version: Dict[str, int] = {}
+        self._cache = TTLCache(maxsize=1024, ttl=30)
+        # One writer serializes all writes; WAL lets the reader pool run SELECTs concurrently
+        self._writer = self._connect()
         self._init()
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(readers):
+            con = self._connect()
+            con.execute("PRAGMA query_only=1")
+            self._readers.put(con)
+        # Writes are handed to a single daemon thread that owns the writer connection
+        self._writes: "queue.SimpleQueue[Optional[Tuple[str, Callable[[sqlite3.Connection], Any], Future]]]" = queue.SimpleQueue()
+        self._writer_thread = threading.Thread(
+            target=self._writer_loop, name="memory-store-writer", daemon=True
+        )
+        self._writer_thread.start()
+        # The writer thread keeps the store alive, so flush and optimize at exit instead of in __del__
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(
+            self.path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=256,
+        )
+        con.executescript(PRAGMAS)
+        return con
+
+    def close(self) -> None:
+        """Update planner statistics and close all connections."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            atexit.unregister(self.close)
+            self._writes.put(None)
+            self._writer_thread.join()
+            try:
+                self._writer.execute("PRAGMA optimize")
+            finally:
+                while not self._readers.empty():
+                    self._readers.get_nowait().close()
+                self._writer.close()
+                self._writer = None
+
+    def _submit(self, thread_id: str, op: Callable[[sqlite3.Connection], Any]) -> Future:
+        fut: Future = Future()
+        # Checked under the lock so nothing is queued behind close()'s sentinel
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("MemoryStore is closed")
+            self._writes.put((thread_id, op, fut))
+        return fut
+
+    def _writer_loop(self) -> None:
+        stop = False
+        while not stop:
+            item = self._writes.get()
+            if item is None:
+                break
+            # Batch only the writes already waiting; a lone write commits immediately
+            batch = [item]
+            while True:
+                try:
+                    item = self._writes.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._run_batch(batch)
+        # Never leave a caller blocked on a write that will not run
+        while True:
+            try:
+                item = self._writes.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                item[2].set_exception(sqlite3.ProgrammingError("MemoryStore is closed"))
 
-    def _conn(self) -> sqlite3.Connection:
-        return sqlite3.connect(self.path)
+    def _run_batch(self, batch: List[Tuple[str, Callable[[sqlite3.Connection], Any], Future]]) -> None:
+        """Run queued writes in one transaction; a failing op only rolls back its savepoint."""
+        con = self._writer
+        outcomes: List[Tuple[Any, Optional[BaseException]]] = []
+        try:
+            # IMMEDIATE takes the write lock up front so the batch never hits SQLITE_BUSY midway
+            con.execute("BEGIN IMMEDIATE")
+            for _, op, _ in batch:
+                con.execute("SAVEPOINT op")
+                try:
+                    outcomes.append((op(con), None))
+                except Exception as e:
+                    con.execute("ROLLBACK TO op")
+                    outcomes.append((None, e))
+                con.execute("RELEASE op")
+            con.execute("COMMIT")
+        except Exception as e:
+            if con.in_transaction:
+                con.execute("ROLLBACK")
+            for _, _, fut in batch:
+                fut.set_exception(e)
+            return
+        for (thread_id, _, fut), (result, error) in zip(batch, outcomes):
+            if error is None:
+                self._bump(thread_id)
+                fut.set_result(result)
+            else:
+                fut.set_exception(error)
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        con = self._readers.get()
+        try:
+            yield con
+        finally:
+            self._readers.put(con)
 
     def _init(self) -> None:
-        with self._conn() as con:
+        with self._lock, self._writer as con:
             con.execute(
                 """
                 CREATE TABLE IF NOT EXISTS memories (
                     id TEXT PRIMARY KEY,
                     thread_id TEXT NOT NULL,
                     content TEXT NOT NULL,
-                    tags TEXT,
+                    tags TEXT NOT NULL DEFAULT '[]' CHECK(json_type(tags) = 'array'),
                     importance INTEGER DEFAULT 1,
                     source TEXT DEFAULT 'agent',
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL
+                    created_at TEXT NOT NULL DEFAULT ({NOW_SQL}),
+                    updated_at TEXT NOT NULL DEFAULT ({NOW_SQL})
+                )
+                """.format(NOW_SQL=NOW_SQL)
+            )
+            # Covering index for list_memories: WHERE thread_id=? ORDER BY updated_at DESC
+            # is served by an index-only scan, replacing the two single-column indexes.
+            # SQLite cannot index rowid explicitly, so the rowid tiebreaker only sorts
+            # rows sharing an updated_at.
+            con.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_mem_thread_updated ON memories(
+                    thread_id, updated_at DESC, id, content, tags, importance, source, created_at
                 )
                 """
             )
-            con.execute("CREATE INDEX IF NOT EXISTS idx_mem_thread ON memories(thread_id)")
-            con.execute("CREATE INDEX IF NOT EXISTS idx_mem_updated ON memories(updated_at)")
+            con.execute("DROP INDEX IF EXISTS idx_mem_thread")
+            con.execute("DROP INDEX IF EXISTS idx_mem_updated")
+            # Databases created before tags became NOT NULL may still hold NULLs
+            con.execute("UPDATE memories SET tags='[]' WHERE tags IS NULL")
+            self._init_fts(con)
+            # Refresh planner stats on open; 0x10000 analyzes existing tables on first boot
+            con.execute("PRAGMA optimize=0x10002")
+
+    def _init_fts(self, con: sqlite3.Connection) -> None:
+        """Shadow memories.content in an FTS5 index kept in sync by triggers.
+
+        The trigram tokenizer keeps search a case-insensitive substring match,
+        so a partial word such as "piz" still finds "pizza".
+        """
+        exists = con.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='memories_fts'"
+        ).fetchone()
+        con.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
+                content, content='memories', content_rowid='rowid', tokenize='trigram'
+            )
+            """
+        )
+        con.executescript(
+            """
+            CREATE TRIGGER IF NOT EXISTS memories_ai AFTER INSERT ON memories BEGIN
+                INSERT INTO memories_fts(rowid, content) VALUES (new.rowid, new.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS memories_ad AFTER DELETE ON memories BEGIN
+                INSERT INTO memories_fts(memories_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS memories_au AFTER UPDATE ON memories BEGIN
+                INSERT INTO memories_fts(memories_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+                INSERT INTO memories_fts(rowid, content) VALUES (new.rowid, new.content);
+            END;
+            """
+        )
+        if not exists:
+            # Index rows written before the FTS table existed
+            con.execute("INSERT INTO memories_fts(memories_fts) VALUES ('rebuild')")
 
     def add_memory(
         self,
@@ -42,73 +284,90 @@ class MemoryStore:
         importance: int = 1,
         source: str = "agent",
     ) -> str:
-        mem_id = uuid.uuid4().hex
-        now = datetime.now().isoformat()
-        with self._conn() as con:
-            con.execute(
-                "INSERT INTO memories(id, thread_id, content, tags, importance, source, created_at, updated_at) VALUES(?,?,?,?,?,?,?,?)",
-                (
-                    mem_id,
-                    thread_id,
-                    content,
-                    json.dumps(tags or []),
-                    importance,
-                    source,
-                    now,
-                    now,
-                ),
-            )
-        return mem_id
-
-    def list_memories(self, thread_id: str, limit: int = 50) -> List[Dict[str, Any]]:
-        with self._conn() as con:
-            rows = con.execute(
-                "SELECT id, content, tags, importance, source, created_at, updated_at FROM memories WHERE thread_id=? ORDER BY updated_at DESC LIMIT ?",
-                (thread_id, limit),
-            ).fetchall()
-        out: List[Dict[str, Any]] = []
-        for r in rows:
-            out.append(
-                {
-                    "id": r[0],
-                    "content": r[1],
-                    "tags": json.loads(r[2] or "[]"),
-                    "importance": r[3],
-                    "source": r[4],
-                    "created_at": r[5],
-                    "updated_at": r[6],
-                }
-            )
-        return out
+        return self.add_memories(thread_id, [(content, tags or [], importance, source)])[0]
+
+    def add_memories(
+        self,
+        thread_id: str,
+        items: List[Tuple[str, List[str], int, str]],
+    ) -> List[str]:
+        """Insert (content, tags, importance, source) items in one transaction."""
+        return self._add_memories(thread_id, items).result()
+
+    def _add_memories(
+        self,
+        thread_id: str,
+        items: List[Tuple[str, List[str], int, str]],
+    ) -> Future:
+        ids = self._new_ids(len(items)) if items else []
+        rows = [
+            (mem_id, thread_id, content, json.dumps(tags or []), importance, source)
+            for mem_id, (content, tags, importance, source) in zip(ids, items)
+        ]
+
+        def op(con: sqlite3.Connection) -> List[str]:
+            con.executemany(INSERT_SQL, rows)
+            return ids
+
+        return self._submit(thread_id, op)
+
+    @staticmethod
+    def _new_ids(n: int) -> List[str]:
+        """32-char hex ids; batches slice one urandom block instead of a syscall per id."""
+        if n == 1:
+            return [secrets.token_hex(16)]
+        buf = os.urandom(16 * n)
+        return [buf[i:i + 16].hex() for i in range(0, 16 * n, 16)]
+
+    def list_memories(
+        self, thread_id: str, limit: int = 50, tag: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        if tag:
+            return self._fetch(thread_id, None, limit, tag, LIST_BY_TAG_SQL, (thread_id, tag, limit))
+        return self._fetch(thread_id, None, limit, tag, LIST_SQL, (thread_id, limit))
 
     def delete_memory(self, thread_id: str, mem_id: str) -> bool:
-        with self._conn() as con:
-            cur = con.execute(
-                "DELETE FROM memories WHERE id=? AND thread_id=?",
-                (mem_id, thread_id),
-            )
-            return cur.rowcount > 0
-
-    def search(self, thread_id: str, query: str, limit: int = 5) -> List[Dict[str, Any]]:
-        # naive LIKE-based search; upgrade to FTS if needed
-        pattern = f"%{query.lower()}%"
-        with self._conn() as con:
-            rows = con.execute(
-                "SELECT id, content, tags, importance, source, created_at, updated_at FROM memories WHERE thread_id=? AND LOWER(content) LIKE ? ORDER BY updated_at DESC LIMIT ?",
-                (thread_id, pattern, limit),
-            ).fetchall()
-        out: List[Dict[str, Any]] = []
-        for r in rows:
-            out.append(
-                {
-                    "id": r[0],
-                    "content": r[1],
-                    "tags": json.loads(r[2] or "[]"),
-                    "importance": r[3],
-                    "source": r[4],
-                    "created_at": r[5],
-                    "updated_at": r[6],
-                }
-            )
-        return out
+        return self._delete_memory(thread_id, mem_id).result()
+
+    def _delete_memory(self, thread_id: str, mem_id: str) -> Future:
+        return self._submit(
+            thread_id, lambda con: con.execute(DELETE_SQL, (mem_id, thread_id)).rowcount > 0
+        )
 
+    def search(
+        self, thread_id: str, query: str, limit: int = 5, tag: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        terms = query.strip()
+        if not terms:
+            return self.list_memories(thread_id, limit, tag)
+        if len(terms) < 3:
+            pattern = f"%{terms}%"
+            if tag:
+                return self._fetch(thread_id, terms, limit, tag, SEARCH_SHORT_BY_TAG_SQL, (thread_id, pattern, tag, limit))
+            return self._fetch(thread_id, terms, limit, tag, SEARCH_SHORT_SQL, (thread_id, pattern, limit))
+        # Quote as a single phrase so FTS5 operators (-, *, OR, ...) in user text are literal
+        match = '"' + terms.replace('"', '""') + '"'
+        if tag:
+            return self._fetch(thread_id, terms, limit, tag, SEARCH_BY_TAG_SQL, (match, thread_id, tag, limit))
+        return self._fetch(thread_id, terms, limit, tag, SEARCH_SQL, (match, thread_id, limit))
+
+    def _bump(self, thread_id: str) -> None:
+        self._version[thread_id] = self._version.get(thread_id, 0) + 1
+
+    def _fetch(
+        self,
+        thread_id: str,
+        query: Optional[str],
+        limit: int,
+        tag: Optional[str],
+        sql: str,
+        params: Tuple,
+    ) -> List[Dict[str, Any]]:
+        # The cache holds the JSON text, so every caller decodes its own copy
+        key = (thread_id, self._version.get(thread_id, 0), query, limit, tag)
+        payload = self._cache.get(key)
+        if payload is None:
+            with self._reader() as con:
+                payload = con.execute(sql, params).fetchone()[0]
+            self._cache.set(key, payload)
+        return _json_loads(payload)
@@ -1,10 +1,13 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable, Tuple
 import json
+import re
+from collections import defaultdict
+from itertools import chain
 from datetime import datetime, date
 from decimal import Decimal
 from langchain_core.tools import tool
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, asc, func
+from sqlalchemy import Row, Select, and_, or_, desc, asc, func, select, case, bindparam
 
 from src.db_models.database import (
     get_db, 
@@ -16,9 +19,113 @@ from src.db_models.database import (
     DailyMenuItemTable
 )
 from src.utils.app_logging import setup_logger
+from src.utils.cache import TTLCache
 
 logger = setup_logger()
 
+# Per-row text templates for the list tools
+_EMP_TMPL = (
+    "• %s %s (%s)\n"
+    "  Position: %s | Department: %s\n"
+    "  Shift: %s | Performance: %s/5.0\n"
+    "  Tenure: %s months | Status: %s\n"
+    "  Email: %s | Phone: %s"
+)
+_STORAGE_TMPL = (
+    "• %s (%s)\n"
+    "  Category: %s | Location: %s\n"
+    "  Stock: %s %s | Min: %s %s\n"
+    "  Status: %s | Cost/unit: $%s\n"
+    "  Supplier: %s%s"
+)
+_RECIPE_TMPL = (
+    "• %s (%s)\n"
+    "  Category: %s | Cuisine: %s\n"
+    "  Difficulty: %s (%s/5)\n"
+    "  Time: %smin prep + %smin cook = %smin total\n"
+    "  Serves: %s | Cost/serving: $%s"
+)
+
+_DIET_RE = re.compile(r"(vegetarian|vegan|gluten_free)", re.IGNORECASE)
+_STATUS_EMOJI = {"available": "✅", "sold_out": "❌", "limited": "⚠️"}
+# Dietary tag line for every vegetarian/vegan/gluten-free bit combination
+_DIET_TAGS = tuple(
+    " | ".join(tag for bit, tag in enumerate(("🥬 Vegetarian", "🌱 Vegan", "🌾 Gluten-Free")) if i >> bit & 1)
+    for i in range(8)
+)
+
+def _parse_iso_date(value: str) -> date:
+    """Parse YYYY-MM-DD via the C fast path, falling back to strptime for e.g. 2024-1-5."""
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def _json_default(o: Any) -> Any:
+    if isinstance(o, Decimal):
+        return float(o)
+    if isinstance(o, (date, datetime)):
+        return o.isoformat()
+    return str(o)
+
+
+# Shared compact encoder for the JSON output branches; Decimal and date
+# columns go straight in and are converted by _json_default.
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj, default=_json_default).decode()
+except ImportError:  # stdlib fallback when orjson is not installed
+    _dumps = json.JSONEncoder(separators=(",", ":"), default=_json_default).encode
+
+_LOW_STOCK_PREVIEW = 50
+# Writers (e.g. setup.py reseeding) run in other processes and cannot clear these
+# caches, so alerts, menus and item details may lag the database by up to 30s.
+_low_stock_cache = TTLCache(maxsize=1, ttl=30)
+_daily_menu_cache = TTLCache(maxsize=256, ttl=30)
+
+# Read-only list tools select just the columns they render; Core rows skip
+# ORM identity-map and change-tracking overhead.
+_EMPLOYEE_COLUMNS = (
+    EmployeeTable.employee_id,
+    EmployeeTable.first_name,
+    EmployeeTable.last_name,
+    EmployeeTable.email,
+    EmployeeTable.phone,
+    EmployeeTable.position,
+    EmployeeTable.department,
+    EmployeeTable.shift_type,
+    EmployeeTable.performance_rating,
+    EmployeeTable.tenure_months,
+    EmployeeTable.status,
+)
+_STORAGE_COLUMNS = (
+    StorageItemTable.item_id,
+    StorageItemTable.item_name,
+    StorageItemTable.category,
+    StorageItemTable.storage_location,
+    StorageItemTable.current_stock,
+    StorageItemTable.minimum_stock,
+    StorageItemTable.unit,
+    StorageItemTable.is_low_stock,
+    StorageItemTable.expiry_date,
+    StorageItemTable.supplier,
+    StorageItemTable.cost_per_unit,
+)
+_RECIPE_COLUMNS = (
+    RecipeTable.recipe_id,
+    RecipeTable.dish_name,
+    RecipeTable.category,
+    RecipeTable.cuisine_type,
+    RecipeTable.difficulty_level,
+    RecipeTable.prep_time_minutes,
+    RecipeTable.cook_time_minutes,
+    RecipeTable.serving_size,
+    RecipeTable.cost_per_serving,
+)
+
 
 # ========================
 # Employee Tools
@@ -45,70 +152,73 @@ def query_employees(
     - limit: Maximum number of results
     """
     try:
-        db = get_db()
-        query = db.query(EmployeeTable)
+        with get_db() as db:
+            query = select(*_EMPLOYEE_COLUMNS)
         
-        if name_filter:
-            query = query.filter(or_(
-                EmployeeTable.first_name.ilike(f"%{name_filter}%"),
-                EmployeeTable.last_name.ilike(f"%{name_filter}%")
-            ))
+            if name_filter:
+                query = query.where(or_(
+                    EmployeeTable.first_name.ilike(f"%{name_filter}%"),
+                    EmployeeTable.last_name.ilike(f"%{name_filter}%")
+                ))
         
-        if position_filter:
-            query = query.filter(EmployeeTable.position.ilike(f"%{position_filter}%"))
+            if position_filter:
+                query = query.where(EmployeeTable.position.ilike(f"%{position_filter}%"))
             
-        if department_filter:
-            query = query.filter(EmployeeTable.department.ilike(f"%{department_filter}%"))
+            if department_filter:
+                query = query.where(EmployeeTable.department.ilike(f"%{department_filter}%"))
             
-        if shift_filter:
-            query = query.filter(EmployeeTable.shift_type == shift_filter)
+            if shift_filter:
+                query = query.where(EmployeeTable.shift_type == shift_filter)
             
-        if status_filter:
-            query = query.filter(EmployeeTable.status == status_filter)
+            if status_filter:
+                query = query.where(EmployeeTable.status == status_filter)
             
-        if min_performance:
-            query = query.filter(EmployeeTable.performance_rating >= min_performance)
-        
-        # Compute total before limiting so callers can distinguish total vs returned
-        total = query.count()
-        employees = query.order_by(EmployeeTable.first_name).all()
-        
-        if not employees:
-            return "No employees found matching the criteria." if output_format == "text" else json.dumps({"type":"employees","items":[]})
-
-        if output_format == "json":
-            items = []
-            for e in employees:
-                items.append({
-                    "employee_id": e.employee_id,
-                    "first_name": e.first_name,
-                    "last_name": e.last_name,
-                    "email": e.email,
-                    "phone": e.phone,
-                    "position": e.position,
-                    "department": e.department,
-                    "shift_type": e.shift_type,
-                    "performance_rating": float(e.performance_rating),
-                    "tenure_months": int(e.tenure_months),
-                    "status": e.status,
-                })
-            db.close()
-            return json.dumps({"type":"employees","total": int(total),"items": items})
-
-        result_lines = [
-            "👥 Employee Information:",
-            f"Total employees: {total}",
-        ]
-        for emp in employees:
-            result_lines.append(
-                f"• {emp.first_name} {emp.last_name} ({emp.employee_id})\n"
-                f"  Position: {emp.position} | Department: {emp.department}\n"
-                f"  Shift: {emp.shift_type} | Performance: {emp.performance_rating}/5.0\n"
-                f"  Tenure: {emp.tenure_months} months | Status: {emp.status}\n"
-                f"  Email: {emp.email} | Phone: {emp.phone}"
-            )
-        db.close()
-        return "\n\n".join(result_lines)
+            if min_performance:
+                query = query.where(EmployeeTable.performance_rating >= min_performance)
+        
+            query = query.order_by(EmployeeTable.first_name)
+            if limit:
+                # The window count is taken before LIMIT, so each row carries the full total
+                query = query.add_columns(func.count().over().label("total")).limit(int(limit))
+            employees = db.execute(query).all()
+            total = employees[0].total if (limit and employees) else len(employees)
+        
+            if not employees:
+                return "No employees found matching the criteria." if output_format == "text" else _dumps({"type":"employees","items":[]})
+
+            if output_format == "json":
+                items = []
+                for e in employees:
+                    items.append({
+                        "employee_id": e.employee_id,
+                        "first_name": e.first_name,
+                        "last_name": e.last_name,
+                        "email": e.email,
+                        "phone": e.phone,
+                        "position": e.position,
+                        "department": e.department,
+                        "shift_type": e.shift_type,
+                        "performance_rating": e.performance_rating,
+                        "tenure_months": e.tenure_months,
+                        "status": e.status,
+                    })
+                return _dumps({"type":"employees","total": total,"items": items})
+
+            result_lines = [
+                "👥 Employee Information:",
+                f"Total employees: {total}",
+            ]
+            result_lines += [
+                _EMP_TMPL % (
+                    emp.first_name, emp.last_name, emp.employee_id,
+                    emp.position, emp.department,
+                    emp.shift_type, emp.performance_rating,
+                    emp.tenure_months, emp.status,
+                    emp.email, emp.phone,
+                )
+                for emp in employees
+            ]
+            return "\n\n".join(result_lines)
         
     except Exception as e:
         logger.error(f"Error querying employees: {str(e)}")
@@ -122,77 +232,66 @@ def get_employee_performance_stats(department: Optional[str] = None) -> str:
     - department: Optional department filter
     """
     try:
-        db = get_db()
-        base = db.query(
-            func.count().label("cnt"),
-            func.avg(EmployeeTable.performance_rating).label("avg_rating"),
-            func.avg(EmployeeTable.tenure_months).label("avg_tenure"),
-        )
-        if department:
-            base = base.filter(EmployeeTable.department.ilike(f"%{department}%"))
-        totals = base.one()
-        total_employees = int(totals.cnt or 0)
-        if total_employees == 0:
-            return "No employees found."
-        avg_performance = float(totals.avg_rating or 0.0)
-        avg_tenure = float(totals.avg_tenure or 0.0)
-
-        # Performance buckets
-        q_high = db.query(func.count()).filter(EmployeeTable.performance_rating >= 4.0)
-        if department:
-            q_high = q_high.filter(EmployeeTable.department.ilike(f"%{department}%"))
-        high_performers = q_high.scalar() or 0
-
-        q_low = db.query(func.count()).filter(EmployeeTable.performance_rating < 3.0)
-        if department:
-            q_low = q_low.filter(EmployeeTable.department.ilike(f"%{department}%"))
-        low_performers = q_low.scalar() or 0
-
-        # Department breakdown
-        dept_rows = (
-            db.query(
+        with get_db() as db:
+            # One round trip: per-department aggregates plus the ROLLUP total row
+            # (department IS NULL), all computed over the same filtered rows.
+            stmt = select(
                 EmployeeTable.department,
                 func.count().label("cnt"),
                 func.avg(EmployeeTable.performance_rating).label("avg_rating"),
+                func.avg(EmployeeTable.tenure_months).label("avg_tenure"),
+                func.sum(case((EmployeeTable.performance_rating >= 4.0, 1), else_=0)).label("high"),
+                func.sum(case((EmployeeTable.performance_rating < 3.0, 1), else_=0)).label("low"),
             )
-            .group_by(EmployeeTable.department)
-            .all()
-        )
-
-        result_lines = [
-            "📊 Employee Performance Statistics:",
-            f"Total Employees: {total_employees}",
-            f"Average Performance Rating: {avg_performance:.2f}/5.0",
-            f"Average Tenure: {avg_tenure:.1f} months",
-            f"High Performers (4.0+): {high_performers} ({high_performers/total_employees*100:.1f}%)",
-            f"Low Performers (<3.0): {low_performers} ({low_performers/total_employees*100:.1f}%)",
-        ]
+            if department:
+                stmt = stmt.where(EmployeeTable.department.ilike(f"%{department}%"))
+            rows = db.execute(stmt.group_by(func.rollup(EmployeeTable.department))).all()
+
+            totals = next((r for r in rows if r.department is None), None)
+            total_employees = int(totals.cnt or 0) if totals else 0
+            if total_employees == 0:
+                return "No employees found."
+            avg_performance = float(totals.avg_rating or 0.0)
+            avg_tenure = float(totals.avg_tenure or 0.0)
+            high_performers = int(totals.high or 0)
+            low_performers = int(totals.low or 0)
+            dept_rows = [
+                (r.department, r.cnt, r.avg_rating) for r in rows if r.department is not None
+            ]
+
+            result_lines = [
+                "📊 Employee Performance Statistics:",
+                f"Total Employees: {total_employees}",
+                f"Average Performance Rating: {avg_performance:.2f}/5.0",
+                f"Average Tenure: {avg_tenure:.1f} months",
+                f"High Performers (4.0+): {high_performers} ({high_performers/total_employees*100:.1f}%)",
+                f"Low Performers (<3.0): {low_performers} ({low_performers/total_employees*100:.1f}%)",
+            ]
+
+            # JSON
+            stats_json = {
+                "type": "employee_stats",
+                "department_filter": department,
+                "total": total_employees,
+                "avg_performance": round(avg_performance, 2),
+                "avg_tenure_months": round(avg_tenure, 1),
+                "high_performers": int(high_performers),
+                "low_performers": int(low_performers),
+                "departments": [
+                    {"department": dept, "count": int(cnt), "avg_rating": round(float(avg or 0),2)}
+                    for dept, cnt, avg in dept_rows
+                ],
+            }
 
-        # JSON
-        stats_json = {
-            "type": "employee_stats",
-            "department_filter": department,
-            "total": total_employees,
-            "avg_performance": round(avg_performance, 2),
-            "avg_tenure_months": round(avg_tenure, 1),
-            "high_performers": int(high_performers),
-            "low_performers": int(low_performers),
-            "departments": [
-                {"department": dept, "count": int(cnt), "avg_rating": round(float(avg or 0),2)}
-                for dept, cnt, avg in dept_rows
-            ],
-        }
-
-        # Text
-        if department is not None:
-            result_lines.append("")
-            result_lines.append("Department Breakdown:")
-            for dept, cnt, avg in dept_rows:
-                result_lines.append(f"• {dept}: {cnt} employees, avg rating {float(avg or 0):.2f}")
+            # Text
+            if department is not None:
+                result_lines.append("")
+                result_lines.append("Department Breakdown:")
+                for dept, cnt, avg in dept_rows:
+                    result_lines.append(f"• {dept}: {cnt} employees, avg rating {float(avg or 0):.2f}")
 
-        db.close()
-        # For backward compat, keep returning text. Planner sets JSON via output_format on other tools.
-        return "\n".join(result_lines)
+            # For backward compat, keep returning text. Planner sets JSON via output_format on other tools.
+            return "\n".join(result_lines)
 
     except Exception as e:
         logger.error(f"Error getting performance stats: {str(e)}")
@@ -222,99 +321,126 @@ def query_storage_inventory(
     - limit: Maximum number of results
     """
     try:
-        db = get_db()
-        query = db.query(StorageItemTable)
+        with get_db() as db:
+            query = select(*_STORAGE_COLUMNS)
         
-        if item_name_filter:
-            query = query.filter(StorageItemTable.item_name.ilike(f"%{item_name_filter}%"))
+            if item_name_filter:
+                query = query.where(StorageItemTable.item_name.ilike(f"%{item_name_filter}%"))
             
-        if category_filter:
-            query = query.filter(StorageItemTable.category.ilike(f"%{category_filter}%"))
+            if category_filter:
+                query = query.where(StorageItemTable.category.ilike(f"%{category_filter}%"))
             
-        if location_filter:
-            query = query.filter(StorageItemTable.storage_location.ilike(f"%{location_filter}%"))
+            if location_filter:
+                query = query.where(StorageItemTable.storage_location.ilike(f"%{location_filter}%"))
             
-        if low_stock_only:
-            query = query.filter(StorageItemTable.is_low_stock == True)
+            if low_stock_only:
+                query = query.where(StorageItemTable.is_low_stock == True)
             
-        if expired_items_only:
-            today = date.today()
-            query = query.filter(and_(
-                StorageItemTable.expiry_date.is_not(None),
-                StorageItemTable.expiry_date <= today
-            ))
-        
-        items = query.order_by(StorageItemTable.item_name).all()
-        
-        if not items:
-            return "No storage items found matching the criteria." if output_format == "text" else json.dumps({"type":"storage","items":[]})
-
-        if output_format == "json":
-            items_json = []
-            for it in items:
-                items_json.append({
-                    "item_id": it.item_id,
-                    "item_name": it.item_name,
-                    "category": it.category,
-                    "location": it.storage_location,
-                    "current_stock": float(it.current_stock),
-                    "minimum_stock": float(it.minimum_stock),
-                    "unit": it.unit,
-                    "is_low_stock": bool(it.is_low_stock),
-                    "expiry_date": it.expiry_date.isoformat() if it.expiry_date else None,
-                    "supplier": it.supplier,
-                    "cost_per_unit": float(it.cost_per_unit),
-                })
-            db.close()
-            return json.dumps({"type":"storage","count":len(items_json),"items":items_json})
-
-        result_lines = ["📦 Storage Inventory:"]
-        for item in items:
-            stock_status = "🔴 LOW STOCK" if item.is_low_stock else "✅ OK"
-            expiry_info = f" | Expires: {item.expiry_date}" if item.expiry_date else ""
-            
-            result_lines.append(
-                f"• {item.item_name} ({item.item_id})\n"
-                f"  Category: {item.category} | Location: {item.storage_location}\n"
-                f"  Stock: {item.current_stock} {item.unit} | Min: {item.minimum_stock} {item.unit}\n"
-                f"  Status: {stock_status} | Cost/unit: ${item.cost_per_unit}\n"
-                f"  Supplier: {item.supplier}{expiry_info}"
-            )
+            if expired_items_only:
+                today = date.today()
+                query = query.where(and_(
+                    StorageItemTable.expiry_date.is_not(None),
+                    StorageItemTable.expiry_date <= today
+                ))
+        
+            query = query.order_by(StorageItemTable.item_name)
+            if limit:
+                query = query.limit(int(limit))
+            # Stream rows in batches rather than materializing the whole table first
+            items = db.execute(query.execution_options(yield_per=500))
+
+            if output_format == "json":
+                items_json = []
+                for it in items:
+                    items_json.append({
+                        "item_id": it.item_id,
+                        "item_name": it.item_name,
+                        "category": it.category,
+                        "location": it.storage_location,
+                        "current_stock": it.current_stock,
+                        "minimum_stock": it.minimum_stock,
+                        "unit": it.unit,
+                        "is_low_stock": bool(it.is_low_stock),
+                        "expiry_date": it.expiry_date,
+                        "supplier": it.supplier,
+                        "cost_per_unit": it.cost_per_unit,
+                    })
+                if not items_json:
+                    return _dumps({"type":"storage","items":[]})
+                return _dumps({"type":"storage","count":len(items_json),"items":items_json})
+
+            result_lines = ["📦 Storage Inventory:"]
+            result_lines += [
+                _STORAGE_TMPL % (
+                    item.item_name, item.item_id,
+                    item.category, item.storage_location,
+                    item.current_stock, item.unit, item.minimum_stock, item.unit,
+                    "🔴 LOW STOCK" if item.is_low_stock else "✅ OK", item.cost_per_unit,
+                    item.supplier, f" | Expires: {item.expiry_date}" if item.expiry_date else "",
+                )
+                for item in items
+            ]
+            if len(result_lines) == 1:
+                return "No storage items found matching the criteria."
         
-        db.close()
-        return "\n\n".join(result_lines)
+            return "\n\n".join(result_lines)
         
     except Exception as e:
         logger.error(f"Error querying storage: {str(e)}")
         return f"❌ Error querying storage: {str(e)}"
 
 
-@tool
-def get_low_stock_alerts() -> str:
-    """Get all items that are currently below minimum stock levels."""
-    try:
-        db = get_db()
-        low_stock_items = db.query(StorageItemTable).filter(StorageItemTable.is_low_stock == True).all()
-        
+def _render_low_stock_alerts() -> str:
+    with get_db() as db:
+        # Worst shortages first, capped; the window count still reports the full total
+        deficit = (StorageItemTable.minimum_stock - StorageItemTable.current_stock).label("deficit")
+        low_stock_items = db.execute(
+            select(
+                StorageItemTable.item_name,
+                StorageItemTable.current_stock,
+                StorageItemTable.minimum_stock,
+                StorageItemTable.unit,
+                StorageItemTable.supplier,
+                deficit,
+                func.count().over().label("total"),
+            )
+            .where(StorageItemTable.is_low_stock.is_(True))
+            .order_by(deficit.desc(), StorageItemTable.item_name)
+            .limit(_LOW_STOCK_PREVIEW)
+        ).all()
+    
         if not low_stock_items:
-            return json.dumps({"type":"low_stock","items":[]})
-        
+            return _dumps({"type":"low_stock","items":[]})
+    
+        total = low_stock_items[0].total
         result_lines = [
             "🚨 LOW STOCK ALERTS:",
-            f"Total items needing restock: {len(low_stock_items)}",
+            f"Total items needing restock: {total}",
             ""
         ]
-        
+    
         for item in low_stock_items:
-            deficit = float(item.minimum_stock - item.current_stock)
             result_lines.append(
                 f"• {item.item_name}\n"
                 f"  Current: {item.current_stock} {item.unit} | Minimum: {item.minimum_stock} {item.unit}\n"
-                f"  Shortage: {deficit} {item.unit} | Supplier: {item.supplier}"
+                f"  Shortage: {float(item.deficit)} {item.unit} | Supplier: {item.supplier}"
             )
-        
-        db.close()
+        if total > len(low_stock_items):
+            result_lines.append(f"... and {total - len(low_stock_items)} more")
+    
         return "\n\n".join(result_lines)
+
+
+@tool
+def get_low_stock_alerts() -> str:
+    """Get all items that are currently below minimum stock levels."""
+    try:
+        # The rendered alert text is cached for the TTL
+        result = _low_stock_cache.get("alerts")
+        if result is None:
+            result = _render_low_stock_alerts()
+            _low_stock_cache.set("alerts", result)
+        return result
         
     except Exception as e:
         logger.error(f"Error getting low stock alerts: {str(e)}")
@@ -344,61 +470,64 @@ def query_recipes(
     - limit: Maximum number of results
     """
     try:
-        db = get_db()
-        query = db.query(RecipeTable)
+        with get_db() as db:
+            query = select(*_RECIPE_COLUMNS)
         
-        if dish_name_filter:
-            query = query.filter(RecipeTable.dish_name.ilike(f"%{dish_name_filter}%"))
+            if dish_name_filter:
+                query = query.where(RecipeTable.dish_name.ilike(f"%{dish_name_filter}%"))
             
-        if category_filter:
-            query = query.filter(RecipeTable.category.ilike(f"%{category_filter}%"))
+            if category_filter:
+                query = query.where(RecipeTable.category.ilike(f"%{category_filter}%"))
             
-        if cuisine_filter:
-            query = query.filter(RecipeTable.cuisine_type.ilike(f"%{cuisine_filter}%"))
+            if cuisine_filter:
+                query = query.where(RecipeTable.cuisine_type.ilike(f"%{cuisine_filter}%"))
             
-        if max_prep_time:
-            query = query.filter(RecipeTable.prep_time_minutes <= max_prep_time)
+            if max_prep_time:
+                query = query.where(RecipeTable.prep_time_minutes <= max_prep_time)
             
-        if difficulty_level:
-            query = query.filter(RecipeTable.difficulty_level == difficulty_level)
-        
-        recipes = query.order_by(RecipeTable.dish_name).all()
-        
-        if not recipes:
-            return "No recipes found matching the criteria." if output_format == "text" else json.dumps({"type":"recipes","items":[]})
-
-        if output_format == "json":
-            items = []
-            for r in recipes:
-                items.append({
-                    "recipe_id": r.recipe_id,
-                    "dish_name": r.dish_name,
-                    "category": r.category,
-                    "cuisine_type": r.cuisine_type,
-                    "difficulty_level": int(r.difficulty_level),
-                    "prep_time_minutes": int(r.prep_time_minutes),
-                    "cook_time_minutes": int(r.cook_time_minutes),
-                    "serving_size": int(r.serving_size),
-                    "cost_per_serving": float(r.cost_per_serving),
-                })
-            db.close()
-            return json.dumps({"type":"recipes","count":len(items),"items":items})
-
-        result_lines = ["👨‍🍳 Recipe Information:"]
-        for recipe in recipes:
-            total_time = recipe.prep_time_minutes + recipe.cook_time_minutes
-            difficulty_stars = "⭐" * recipe.difficulty_level
-            
-            result_lines.append(
-                f"• {recipe.dish_name} ({recipe.recipe_id})\n"
-                f"  Category: {recipe.category} | Cuisine: {recipe.cuisine_type}\n"
-                f"  Difficulty: {difficulty_stars} ({recipe.difficulty_level}/5)\n"
-                f"  Time: {recipe.prep_time_minutes}min prep + {recipe.cook_time_minutes}min cook = {total_time}min total\n"
-                f"  Serves: {recipe.serving_size} | Cost/serving: ${recipe.cost_per_serving}"
-            )
+            if difficulty_level:
+                query = query.where(RecipeTable.difficulty_level == difficulty_level)
+        
+            query = query.order_by(RecipeTable.dish_name)
+            if limit:
+                query = query.limit(int(limit))
+            # Stream rows in batches rather than materializing the whole table first
+            recipes = db.execute(query.execution_options(yield_per=500))
+
+            if output_format == "json":
+                items = []
+                for r in recipes:
+                    items.append({
+                        "recipe_id": r.recipe_id,
+                        "dish_name": r.dish_name,
+                        "category": r.category,
+                        "cuisine_type": r.cuisine_type,
+                        "difficulty_level": r.difficulty_level,
+                        "prep_time_minutes": r.prep_time_minutes,
+                        "cook_time_minutes": r.cook_time_minutes,
+                        "serving_size": r.serving_size,
+                        "cost_per_serving": r.cost_per_serving,
+                    })
+                if not items:
+                    return _dumps({"type":"recipes","items":[]})
+                return _dumps({"type":"recipes","count":len(items),"items":items})
+
+            result_lines = ["👨‍🍳 Recipe Information:"]
+            result_lines += [
+                _RECIPE_TMPL % (
+                    recipe.dish_name, recipe.recipe_id,
+                    recipe.category, recipe.cuisine_type,
+                    "⭐" * recipe.difficulty_level, recipe.difficulty_level,
+                    recipe.prep_time_minutes, recipe.cook_time_minutes,
+                    recipe.prep_time_minutes + recipe.cook_time_minutes,
+                    recipe.serving_size, recipe.cost_per_serving,
+                )
+                for recipe in recipes
+            ]
+            if len(result_lines) == 1:
+                return "No recipes found matching the criteria."
         
-        db.close()
-        return "\n\n".join(result_lines)
+            return "\n\n".join(result_lines)
         
     except Exception as e:
         logger.error(f"Error querying recipes: {str(e)}")
@@ -413,99 +542,95 @@ def get_recipe_details(recipe_id: Optional[str] = None, dish_name: Optional[str]
     - dish_name: Dish name to look up (used when recipe_id is not provided)
     """
     try:
-        db = get_db()
-        recipe = None
-        if recipe_id:
-            recipe = db.query(RecipeTable).filter(RecipeTable.recipe_id == recipe_id).first()
-        elif dish_name:
-            # Prefer exact case-insensitive match, otherwise first ilike match
-            exact = db.query(RecipeTable).filter(RecipeTable.dish_name.ilike(dish_name)).first()
-            if exact:
-                recipe = exact
-            else:
-                recipe = (
-                    db.query(RecipeTable)
-                    .filter(RecipeTable.dish_name.ilike(f"%{dish_name}%"))
-                    .order_by(RecipeTable.dish_name)
-                    .first()
+        with get_db() as db:
+            row = None
+            if recipe_id or dish_name:
+                # Recipe row and its ingredients (aggregated to JSON) in one round trip
+                ingredients_json = (
+                    select(func.json_agg(func.json_build_object(
+                        "ingredient_name", RecipeIngredientTable.ingredient_name,
+                        "quantity", RecipeIngredientTable.quantity,
+                        "unit", RecipeIngredientTable.unit,
+                        "percentage", RecipeIngredientTable.percentage,
+                        "timing", RecipeIngredientTable.timing,
+                        "notes", RecipeIngredientTable.notes,
+                    )))
+                    .where(RecipeIngredientTable.recipe_id == RecipeTable.recipe_id)
+                    .scalar_subquery()
                 )
+                stmt = select(RecipeTable, ingredients_json.label("ingredients"))
+                if recipe_id:
+                    stmt = stmt.where(RecipeTable.recipe_id == recipe_id)
+                else:
+                    # Prefer exact case-insensitive match, otherwise first ilike match
+                    stmt = stmt.where(RecipeTable.dish_name.ilike(f"%{dish_name}%")).order_by(
+                        RecipeTable.dish_name.ilike(dish_name).desc(), RecipeTable.dish_name
+                    )
+                row = db.execute(stmt.limit(1)).first()
+        
+            if not row:
+                return _dumps({
+                    "type": "recipe_details",
+                    "found": False,
+                    "recipe_id": recipe_id,
+                    "dish_name": dish_name,
+                    "message": "not_found",
+                })
         
-        if not recipe:
-            return json.dumps({
-                "type": "recipe_details",
-                "found": False,
-                "recipe_id": recipe_id,
-                "dish_name": dish_name,
-                "message": "not_found",
-            })
-        
-        # Get ingredients
-        ingredients = db.query(RecipeIngredientTable).filter(
-            RecipeIngredientTable.recipe_id == recipe_id
-        ).all()
+            recipe = row.RecipeTable
+            ingredients = row.ingredients or []
         
-        result_lines = [
-            f"🍽️ {recipe.dish_name}",
-            f"Category: {recipe.category} | Cuisine: {recipe.cuisine_type}",
-            f"Difficulty: {'⭐' * recipe.difficulty_level} ({recipe.difficulty_level}/5)",
-            f"Prep Time: {recipe.prep_time_minutes} minutes",
-            f"Cook Time: {recipe.cook_time_minutes} minutes", 
-            f"Total Time: {recipe.prep_time_minutes + recipe.cook_time_minutes} minutes",
-            f"Serves: {recipe.serving_size} people",
-            f"Cost per serving: ${recipe.cost_per_serving}",
-            ""
-        ]
+            result_lines = [
+                f"🍽️ {recipe.dish_name}",
+                f"Category: {recipe.category} | Cuisine: {recipe.cuisine_type}",
+                f"Difficulty: {'⭐' * recipe.difficulty_level} ({recipe.difficulty_level}/5)",
+                f"Prep Time: {recipe.prep_time_minutes} minutes",
+                f"Cook Time: {recipe.cook_time_minutes} minutes", 
+                f"Total Time: {recipe.prep_time_minutes + recipe.cook_time_minutes} minutes",
+                f"Serves: {recipe.serving_size} people",
+                f"Cost per serving: ${recipe.cost_per_serving}",
+                ""
+            ]
         
-        if ingredients:
-            result_lines.append("📋 Ingredients:")
-            for ing in ingredients:
-                timing_info = f" (add {ing.timing})" if ing.timing != "prep" else ""
-                notes_info = f" - {ing.notes}" if ing.notes else ""
-                result_lines.append(
-                    f"• {ing.quantity} {ing.unit} {ing.ingredient_name} ({ing.percentage}%){timing_info}{notes_info}"
-                )
-            result_lines.append("")
+            if ingredients:
+                result_lines.append("📋 Ingredients:")
+                for ing in ingredients:
+                    timing_info = f" (add {ing['timing']})" if ing["timing"] != "prep" else ""
+                    notes_info = f" - {ing['notes']}" if ing["notes"] else ""
+                    result_lines.append(
+                        f"• {ing['quantity']} {ing['unit']} {ing['ingredient_name']} ({ing['percentage']}%){timing_info}{notes_info}"
+                    )
+                result_lines.append("")
         
-        if recipe.instructions:
-            result_lines.append("📝 Instructions:")
-            for i, instruction in enumerate(recipe.instructions, 1):
-                result_lines.append(f"{i}. {instruction}")
-            result_lines.append("")
+            if recipe.instructions:
+                result_lines.append("📝 Instructions:")
+                for i, instruction in enumerate(recipe.instructions, 1):
+                    result_lines.append(f"{i}. {instruction}")
+                result_lines.append("")
         
-        if recipe.allergens:
-            result_lines.append(f"⚠️ Allergens: {', '.join(recipe.allergens)}")
+            if recipe.allergens:
+                result_lines.append(f"⚠️ Allergens: {', '.join(recipe.allergens)}")
         
-        # JSON version
-        rd = {
-            "type": "recipe_details",
-            "found": True,
-            "recipe": {
-                "recipe_id": recipe.recipe_id,
-                "dish_name": recipe.dish_name,
-                "category": recipe.category,
-                "cuisine_type": recipe.cuisine_type,
-                "difficulty_level": int(recipe.difficulty_level),
-                "prep_time_minutes": int(recipe.prep_time_minutes),
-                "cook_time_minutes": int(recipe.cook_time_minutes),
-                "serving_size": int(recipe.serving_size),
-                "instructions": recipe.instructions or [],
-                "allergens": recipe.allergens or [],
-                "cost_per_serving": float(recipe.cost_per_serving),
-            },
-            "ingredients": [
-                {
-                    "ingredient_name": ing.ingredient_name,
-                    "quantity": float(ing.quantity),
-                    "unit": ing.unit,
-                    "percentage": float(ing.percentage),
-                    "timing": ing.timing,
-                    "notes": ing.notes,
-                }
-                for ing in ingredients
-            ],
-        }
-        db.close()
-        return "\n".join(result_lines)  # keep text; planner typically uses JSON on menu tools
+            # JSON version
+            rd = {
+                "type": "recipe_details",
+                "found": True,
+                "recipe": {
+                    "recipe_id": recipe.recipe_id,
+                    "dish_name": recipe.dish_name,
+                    "category": recipe.category,
+                    "cuisine_type": recipe.cuisine_type,
+                    "difficulty_level": int(recipe.difficulty_level),
+                    "prep_time_minutes": int(recipe.prep_time_minutes),
+                    "cook_time_minutes": int(recipe.cook_time_minutes),
+                    "serving_size": int(recipe.serving_size),
+                    "instructions": recipe.instructions or [],
+                    "allergens": recipe.allergens or [],
+                    "cost_per_serving": float(recipe.cost_per_serving),
+                },
+                "ingredients": ingredients,
+            }
+            return "\n".join(result_lines)  # keep text; planner typically uses JSON on menu tools
         
     except Exception as e:
         logger.error(f"Error getting recipe details: {str(e)}")
@@ -515,6 +640,195 @@ def get_recipe_details(recipe_id: Optional[str] = None, dish_name: Optional[str]
 # ========================
 # Daily Menu Tools
 # ========================
+# Base statements are built once at import with bound parameters; per-call
+# filters are appended on top, so the compiled-statement cache key stays stable.
+# Item fields in JSON payload order; they lead each row so the payload dict is
+# a zip of these keys with the row. Flags are coalesced so JSON gets real booleans.
+_MENU_ITEM_COLUMNS = (
+    DailyMenuItemTable.dish_name,
+    DailyMenuItemTable.price,
+    DailyMenuItemTable.status,
+    DailyMenuItemTable.description,
+    DailyMenuItemTable.category,
+    DailyMenuItemTable.estimated_prep_time,
+    func.coalesce(DailyMenuItemTable.is_vegetarian, False).label("is_vegetarian"),
+    func.coalesce(DailyMenuItemTable.is_vegan, False).label("is_vegan"),
+    func.coalesce(DailyMenuItemTable.is_gluten_free, False).label("is_gluten_free"),
+    DailyMenuItemTable.spicy_level,
+    DailyMenuItemTable.available_quantity,
+    DailyMenuItemTable.calories,
+)
+_MENU_ITEM_KEYS = tuple(c.key for c in _MENU_ITEM_COLUMNS)
+_MENU_ITEMS_STMT = (
+    select(
+        *_MENU_ITEM_COLUMNS,
+        DailyMenuTable.restaurant_location,
+        DailyMenuTable.chef_recommendation,
+        DailyMenuTable.special_offers,
+    )
+    .join(DailyMenuTable, DailyMenuItemTable.menu_id == DailyMenuTable.menu_id)
+    .where(DailyMenuTable.menu_date == bindparam("menu_date"))
+)
+_MENU_EXISTS_STMT = (
+    select(DailyMenuTable.menu_id)
+    .where(DailyMenuTable.menu_date == bindparam("menu_date"))
+    .limit(1)
+)
+_MENU_ITEM_DETAILS_STMT = (
+    select(
+        *_MENU_ITEM_COLUMNS,
+        DailyMenuTable.restaurant_location,
+        RecipeTable.recipe_id,
+        RecipeTable.cuisine_type,
+        RecipeTable.difficulty_level,
+        RecipeTable.prep_time_minutes,
+        RecipeTable.cook_time_minutes,
+        RecipeTable.serving_size,
+        RecipeTable.allergens,
+    )
+    .join(DailyMenuTable, DailyMenuItemTable.menu_id == DailyMenuTable.menu_id)
+    .outerjoin(RecipeTable, DailyMenuItemTable.recipe_id == RecipeTable.recipe_id)
+    .where(
+        DailyMenuTable.menu_date == bindparam("menu_date"),
+        DailyMenuItemTable.dish_name.ilike(bindparam("dish_pattern")),
+    )
+    .limit(1)
+)
+
+
+def _daily_menu_stmt(
+    location: Optional[str],
+    category_filter: Optional[str],
+    price_bounds: Optional[Tuple[float, float]],
+    dietary_restrictions: Optional[str],
+) -> Select:
+    # Menu items paired with their menu in a single JOIN
+    items_query = _MENU_ITEMS_STMT
+
+    if location:
+        items_query = items_query.where(DailyMenuTable.restaurant_location.ilike(f"%{location}%"))
+
+    if category_filter:
+        items_query = items_query.where(DailyMenuItemTable.category.ilike(f"%{category_filter}%"))
+
+    if price_bounds:
+        min_price, max_price = price_bounds
+        items_query = items_query.where(
+            and_(DailyMenuItemTable.price >= min_price, DailyMenuItemTable.price <= max_price)
+        )
+
+    if dietary_restrictions:
+        flags = {m.group(1).lower() for m in _DIET_RE.finditer(dietary_restrictions)}
+        # One AND clause per flag combination keeps the statement shape (and cache key) stable
+        conds = []
+        if "vegetarian" in flags:
+            conds.append(DailyMenuItemTable.is_vegetarian.is_(True))
+        if "vegan" in flags:
+            conds.append(DailyMenuItemTable.is_vegan.is_(True))
+        if "gluten_free" in flags:
+            conds.append(DailyMenuItemTable.is_gluten_free.is_(True))
+        if conds:
+            items_query = items_query.where(and_(*conds))
+
+    return items_query.order_by(DailyMenuItemTable.category, DailyMenuItemTable.dish_name)
+
+
+def _daily_menu_json(target_date: date, items: Iterable[Row]) -> str:
+    locations: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for row in items:
+        locations[row.restaurant_location].append(dict(zip(_MENU_ITEM_KEYS, row)))
+    payload = {
+        "type": "daily_menu",
+        "date": target_date,
+        "locations": [
+            {"location": loc, "items": lst} for loc, lst in locations.items()
+        ],
+    }
+    return _dumps(payload)
+
+
+def _daily_menu_text(target_date: date, items: Iterable[Row]) -> str:
+    result_lines = [f"🍽️ Daily Menu for {target_date}:"]
+
+    # Group by menu/location
+    menu_items_by_location = defaultdict(list)
+    for item in items:
+        menu_items_by_location[item.restaurant_location].append(item)
+
+    for location, location_items in menu_items_by_location.items():
+        result_lines.append(f"\n📍 {location}:")
+
+        menu = location_items[0]  # Menu fields repeat on every row of the location
+        if menu.chef_recommendation:
+            result_lines.append(f"👨‍🍳 Chef's Recommendation: {menu.chef_recommendation}")
+
+        if menu.special_offers:
+            result_lines.append(f"🎯 Special Offers: {', '.join(menu.special_offers)}")
+
+        result_lines.append("")
+
+        # Group items by category
+        items_by_category = defaultdict(list)
+        for item in location_items:
+            items_by_category[item.category].append(item)
+
+        for category, category_items in items_by_category.items():
+            result_lines.append(f"--- {category.upper()} ---")
+            for item in category_items:
+                status_emoji = _STATUS_EMOJI.get(item.status, "")
+                dietary_tags = _DIET_TAGS[
+                    item.is_vegetarian | item.is_vegan << 1 | item.is_gluten_free << 2
+                ]
+                spicy_info = f" 🌶️ Spice Level: {item.spicy_level}" if item.spicy_level else ""
+
+                result_lines.append(f"• {item.dish_name} - ${item.price} {status_emoji}")
+                result_lines.append(f"  {item.description}")
+                result_lines.append(f"  Prep time: {item.estimated_prep_time} min{spicy_info}")
+                if dietary_tags:
+                    result_lines.append(f"  {dietary_tags}")
+            result_lines.append("")
+
+    return "\n".join(result_lines)
+
+
+def _render_daily_menu(
+    target_date: date,
+    location: Optional[str],
+    category_filter: Optional[str],
+    price_range: Optional[str],
+    dietary_restrictions: Optional[str],
+    output_format: str,
+) -> str:
+    price_bounds = None
+    if price_range:
+        try:
+            min_price, max_price = map(float, price_range.split("-"))
+        except ValueError:
+            return "❌ Invalid price range format. Please use format like '10-20'."
+        price_bounds = (min_price, max_price)
+
+    stmt = _daily_menu_stmt(location, category_filter, price_bounds, dietary_restrictions)
+
+    with get_db() as db:
+        # Group rows as they stream off a server-side cursor instead of materializing them first
+        rows = db.execute(stmt.execution_options(yield_per=500), {"menu_date": target_date})
+        first = next(rows, None)
+
+        if first is None:
+            # Tell "no menu for the date/location" apart from "filters matched nothing"
+            menu_stmt = _MENU_EXISTS_STMT
+            if location:
+                menu_stmt = menu_stmt.where(DailyMenuTable.restaurant_location.ilike(f"%{location}%"))
+            if db.execute(menu_stmt, {"menu_date": target_date}).first() is None:
+                return f"No menus found for date {target_date}."
+            return "No menu items found matching the criteria." if output_format == "text" else _dumps({"type":"daily_menu","date":target_date,"items":[]})
+
+        items = chain((first,), rows)
+        if output_format == "json":
+            return _daily_menu_json(target_date, items)
+        return _daily_menu_text(target_date, items)
+
+
 @tool
 def query_daily_menu(
     menu_date: Optional[str] = None,
@@ -533,249 +847,108 @@ def query_daily_menu(
     - dietary_restrictions: vegetarian, vegan, gluten_free
     """
     try:
-        db = get_db()
-        
         # Parse date
         if menu_date:
             try:
-                target_date = datetime.strptime(menu_date, "%Y-%m-%d").date()
+                target_date = _parse_iso_date(menu_date)
             except ValueError:
                 return "❌ Invalid date format. Please use YYYY-MM-DD."
         else:
             target_date = date.today()
-        
-        # Query menus for the date
-        menu_query = db.query(DailyMenuTable).filter(DailyMenuTable.menu_date == target_date)
-        
-        if location:
-            menu_query = menu_query.filter(DailyMenuTable.restaurant_location.ilike(f"%{location}%"))
-        
-        menus = menu_query.all()
-        
-        if not menus:
-            return f"No menus found for date {target_date}."
-        
-        # Query menu items
-        menu_ids = [menu.menu_id for menu in menus]
-        items_query = db.query(DailyMenuItemTable).filter(DailyMenuItemTable.menu_id.in_(menu_ids))
-        
-        if category_filter:
-            items_query = items_query.filter(DailyMenuItemTable.category.ilike(f"%{category_filter}%"))
-        
-        if price_range:
-            try:
-                min_price, max_price = map(float, price_range.split("-"))
-                items_query = items_query.filter(
-                    and_(DailyMenuItemTable.price >= min_price, DailyMenuItemTable.price <= max_price)
-                )
-            except ValueError:
-                return "❌ Invalid price range format. Please use format like '10-20'."
-        
-        if dietary_restrictions:
-            if "vegetarian" in dietary_restrictions.lower():
-                items_query = items_query.filter(DailyMenuItemTable.is_vegetarian == True)
-            if "vegan" in dietary_restrictions.lower():
-                items_query = items_query.filter(DailyMenuItemTable.is_vegan == True)
-            if "gluten_free" in dietary_restrictions.lower():
-                items_query = items_query.filter(DailyMenuItemTable.is_gluten_free == True)
-        
-        items = items_query.order_by(DailyMenuItemTable.category, DailyMenuItemTable.dish_name).all()
-        
-        if not items:
-            return "No menu items found matching the criteria." if output_format == "text" else json.dumps({"type":"daily_menu","date":str(target_date),"items":[]})
 
-        if output_format == "json":
-            locations: Dict[str, List[Dict[str, Any]]] = {}
-            for item in items:
-                menu = next(m for m in menus if m.menu_id == item.menu_id)
-                loc = menu.restaurant_location
-                if loc not in locations:
-                    locations[loc] = []
-                locations[loc].append({
-                    "dish_name": item.dish_name,
-                    "price": float(item.price),
-                    "status": item.status,
-                    "description": item.description,
-                    "category": item.category,
-                    "estimated_prep_time": int(item.estimated_prep_time),
-                    "is_vegetarian": bool(item.is_vegetarian),
-                    "is_vegan": bool(item.is_vegan),
-                    "is_gluten_free": bool(item.is_gluten_free),
-                    "spicy_level": int(item.spicy_level) if item.spicy_level is not None else None,
-                    "available_quantity": int(item.available_quantity) if item.available_quantity is not None else None,
-                    "calories": int(item.calories) if item.calories is not None else None,
-                })
-            payload = {
-                "type": "daily_menu",
-                "date": target_date.isoformat(),
-                "locations": [
-                    {"location": loc, "items": lst} for loc, lst in locations.items()
-                ],
-            }
-            db.close()
-            return json.dumps(payload)
-
-        result_lines = [f"🍽️ Daily Menu for {target_date}:"]
-        
-        # Group by menu/location
-        menu_items_by_location = {}
-        for item in items:
-            menu = next(m for m in menus if m.menu_id == item.menu_id)
-            if menu.restaurant_location not in menu_items_by_location:
-                menu_items_by_location[menu.restaurant_location] = []
-            menu_items_by_location[menu.restaurant_location].append((menu, item))
-        
-        for location, location_items in menu_items_by_location.items():
-            result_lines.append(f"\n📍 {location}:")
-            
-            menu = location_items[0][0]  # Get menu info
-            if menu.chef_recommendation:
-                result_lines.append(f"👨‍🍳 Chef's Recommendation: {menu.chef_recommendation}")
-            
-            if menu.special_offers:
-                result_lines.append(f"🎯 Special Offers: {', '.join(menu.special_offers)}")
-            
-            result_lines.append("")
-            
-            # Group items by category
-            items_by_category = {}
-            for _, item in location_items:
-                if item.category not in items_by_category:
-                    items_by_category[item.category] = []
-                items_by_category[item.category].append(item)
-            
-            for category, category_items in items_by_category.items():
-                result_lines.append(f"--- {category.upper()} ---")
-                for item in category_items:
-                    status_emoji = {"available": "✅", "sold_out": "❌", "limited": "⚠️"}.get(item.status, "")
-                    dietary_tags = []
-                    if item.is_vegetarian: dietary_tags.append("🥬 Vegetarian")
-                    if item.is_vegan: dietary_tags.append("🌱 Vegan") 
-                    if item.is_gluten_free: dietary_tags.append("🌾 Gluten-Free")
-                    spicy_info = f" 🌶️ Spice Level: {item.spicy_level}" if item.spicy_level else ""
-                    
-                    result_lines.append(
-                        f"• {item.dish_name} - ${item.price} {status_emoji}\n"
-                        f"  {item.description}\n"
-                        f"  Prep time: {item.estimated_prep_time} min{spicy_info}\n"
-                        f"  {' | '.join(dietary_tags)}" if dietary_tags else ""
-                    )
-                result_lines.append("")
-        
-        db.close()
-        return "\n".join(result_lines)
+        # Agents repeat the same lookup within a conversation; serve it from cache
+        key = (target_date, location, category_filter, price_range, dietary_restrictions, output_format)
+        result = _daily_menu_cache.get(key)
+        if result is None:
+            result = _render_daily_menu(
+                target_date, location, category_filter, price_range, dietary_restrictions, output_format
+            )
+            _daily_menu_cache.set(key, result)
+        return result
         
     except Exception as e:
         logger.error(f"Error querying daily menu: {str(e)}")
         return f"❌ Error querying daily menu: {str(e)}"
 
 
-@tool
-def get_menu_item_details(dish_name: str, menu_date: Optional[str] = None) -> str:
-    """Get detailed information about a specific menu item including recipe and availability.
-    
-    - dish_name: Name of the dish to look up
-    - menu_date: Date in YYYY-MM-DD format (defaults to today)
-    """
-    try:
-        db = get_db()
-        
-        # Parse date
-        if menu_date:
-            try:
-                target_date = datetime.strptime(menu_date, "%Y-%m-%d").date()
-            except ValueError:
-                return "❌ Invalid date format. Please use YYYY-MM-DD."
-        else:
-            target_date = date.today()
-        
-        # Find the menu item
-        menu_item = db.query(DailyMenuItemTable).join(DailyMenuTable).filter(
-            and_(
-                DailyMenuTable.menu_date == target_date,
-                DailyMenuItemTable.dish_name.ilike(f"%{dish_name}%")
-            )
+def _render_menu_item_details(target_date: date, dish_name: str) -> str:
+    with get_db() as db:
+        # Find the menu item with its menu location and recipe columns in one row
+        menu_item = db.execute(
+            _MENU_ITEM_DETAILS_STMT,
+            {"menu_date": target_date, "dish_pattern": f"%{dish_name}%"},
         ).first()
-        
+    
         if not menu_item:
-            return json.dumps({"type":"menu_item_details","found":False,"dish_name":dish_name,"date":str(target_date)})
-        
-        # Get the associated recipe
-        recipe = db.query(RecipeTable).filter(RecipeTable.recipe_id == menu_item.recipe_id).first()
-        
-        # Get menu info
-        menu = db.query(DailyMenuTable).filter(DailyMenuTable.menu_id == menu_item.menu_id).first()
-        
+            return _dumps({"type":"menu_item_details","found":False,"dish_name":dish_name,"date":target_date})
+    
         result_lines = [
             f"🍽️ {menu_item.dish_name}",
-            f"📍 Location: {menu.restaurant_location}",
+            f"📍 Location: {menu_item.restaurant_location}",
             f"💰 Price: ${menu_item.price}",
             f"📝 Description: {menu_item.description}",
             f"🕐 Estimated prep time: {menu_item.estimated_prep_time} minutes",
             f"📊 Status: {menu_item.status}",
             ""
         ]
-        
+    
         # Dietary information
-        dietary_info = []
-        if menu_item.is_vegetarian: dietary_info.append("🥬 Vegetarian")
-        if menu_item.is_vegan: dietary_info.append("🌱 Vegan")
-        if menu_item.is_gluten_free: dietary_info.append("🌾 Gluten-Free")
+        diet_tags = _DIET_TAGS[
+            menu_item.is_vegetarian | menu_item.is_vegan << 1 | menu_item.is_gluten_free << 2
+        ]
+        dietary_info = [diet_tags] if diet_tags else []
         if menu_item.spicy_level: dietary_info.append(f"🌶️ Spice Level: {menu_item.spicy_level}/5")
         if menu_item.calories: dietary_info.append(f"🔥 Calories: {menu_item.calories}")
-        
+    
         if dietary_info:
             result_lines.append(" | ".join(dietary_info))
             result_lines.append("")
-        
+    
         if menu_item.available_quantity:
             result_lines.append(f"📦 Limited quantity available: {menu_item.available_quantity}")
             result_lines.append("")
-        
-        # Recipe information
-        if recipe:
+    
+        # Recipe information; the outer join leaves recipe_id NULL when there is no recipe
+        if menu_item.recipe_id is not None:
             result_lines.extend([
                 "👨‍🍳 Recipe Information:",
-                f"Cuisine: {recipe.cuisine_type}",
-                f"Difficulty: {'⭐' * recipe.difficulty_level} ({recipe.difficulty_level}/5)",
-                f"Total cooking time: {recipe.prep_time_minutes + recipe.cook_time_minutes} minutes",
-                f"Serves: {recipe.serving_size}",
+                f"Cuisine: {menu_item.cuisine_type}",
+                f"Difficulty: {'⭐' * menu_item.difficulty_level} ({menu_item.difficulty_level}/5)",
+                f"Total cooking time: {menu_item.prep_time_minutes + menu_item.cook_time_minutes} minutes",
+                f"Serves: {menu_item.serving_size}",
                 ""
             ])
-            
-            if recipe.allergens:
-                result_lines.append(f"⚠️ Allergens: {', '.join(recipe.allergens)}")
         
-        # JSON structure
-        payload = {
-            "type": "menu_item_details",
-            "found": True,
-            "date": target_date.isoformat(),
-            "location": menu.restaurant_location,
-            "dish": {
-                "dish_name": menu_item.dish_name,
-                "price": float(menu_item.price),
-                "description": menu_item.description,
-                "estimated_prep_time": int(menu_item.estimated_prep_time),
-                "status": menu_item.status,
-                "spicy_level": int(menu_item.spicy_level) if menu_item.spicy_level is not None else None,
-                "is_vegetarian": bool(menu_item.is_vegetarian),
-                "is_vegan": bool(menu_item.is_vegan),
-                "is_gluten_free": bool(menu_item.is_gluten_free),
-                "calories": int(menu_item.calories) if menu_item.calories is not None else None,
-                "available_quantity": int(menu_item.available_quantity) if menu_item.available_quantity is not None else None,
-            },
-            "recipe": {
-                "recipe_id": recipe.recipe_id if recipe else None,
-                "cuisine_type": recipe.cuisine_type if recipe else None,
-                "difficulty_level": int(recipe.difficulty_level) if recipe else None,
-                "total_cook_time": int((recipe.prep_time_minutes + recipe.cook_time_minutes)) if recipe else None,
-                "serving_size": int(recipe.serving_size) if recipe else None,
-                "allergens": recipe.allergens if (recipe and recipe.allergens) else [],
-            },
-        }
-        db.close()
+            if menu_item.allergens:
+                result_lines.append(f"⚠️ Allergens: {', '.join(menu_item.allergens)}")
+    
         return "\n".join(result_lines)
+
+
+@tool
+def get_menu_item_details(dish_name: str, menu_date: Optional[str] = None) -> str:
+    """Get detailed information about a specific menu item including recipe and availability.
+    
+    - dish_name: Name of the dish to look up
+    - menu_date: Date in YYYY-MM-DD format (defaults to today)
+    """
+    try:
+        # Parse date
+        if menu_date:
+            try:
+                target_date = _parse_iso_date(menu_date)
+            except ValueError:
+                return "❌ Invalid date format. Please use YYYY-MM-DD."
+        else:
+            target_date = date.today()
+
+        # Agents ask about the same dish repeatedly; shares the daily menu cache
+        key = ("details", target_date, dish_name)
+        result = _daily_menu_cache.get(key)
+        if result is None:
+            result = _render_menu_item_details(target_date, dish_name)
+            _daily_menu_cache.set(key, result)
+        return result
         
     except Exception as e:
         logger.error(f"Error getting menu item details: {str(e)}")
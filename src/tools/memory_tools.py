@@ -37,10 +37,12 @@ def list_memories(thread_id: str, limit: int = 20) -> str:
         items = store.list_memories(thread_id, int(limit))
         if not items:
             return "No memories stored."
+        # The store returns complete rows from one query; tags is always a list
         lines = ["🗂️ Memories:"]
-        for m in items:
-            tags = ", ".join(m.get("tags", []))
-            lines.append(f"- {m['id']}: {m['content']} [{tags}] ({m['updated_at'][:19]})")
+        lines += [
+            f"- {m['id']}: {m['content']} [{', '.join(m['tags'])}] ({m['updated_at'][:19]})"
+            for m in items
+        ]
         return "\n".join(lines)
     except Exception as e:
         return f"❌ Error listing memories: {str(e)}"
@@ -54,8 +56,7 @@ def search_memory(thread_id: str, query: str, limit: int = 5) -> str:
         if not items:
             return "No matching memories."
         lines = [f"🔍 Memory search for '{query}':"]
-        for m in items:
-            lines.append(f"- {m['id']}: {m['content']} [{', '.join(m.get('tags', []))}]")
+        lines += [f"- {m['id']}: {m['content']} [{', '.join(m['tags'])}]" for m in items]
         return "\n".join(lines)
     except Exception as e:
         return f"❌ Error searching memories: {str(e)}"
@@ -3,12 +3,16 @@ Synthetic data generator for restaurant CRM system.
 Generates realistic employee, recipe, storage, and menu data.
 """
 
+import multiprocessing
 import random
 import uuid
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, date, timedelta
 from decimal import Decimal
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import numpy as np
 from faker import Faker
+from sqlalchemy import text
 
 # Allow running this file directly (python src/utils/data_generator.py)
 # by ensuring the project root is on sys.path so `import src...` works.
@@ -144,16 +148,39 @@ COOKING_INSTRUCTIONS = [
     "Adjust seasoning as needed"
 ]
 
+# Shared instruction/allergen combinations. Recipes pick from these pools instead
+# of sampling fresh lists, so identical combinations are reused across rows.
+_INSTR_POOLS = [
+    tuple(random.sample(COOKING_INSTRUCTIONS, k)) for k in range(4, 9) for _ in range(20)
+]
+_ALLERGEN_POOLS = [
+    tuple(random.sample(COMMON_ALLERGENS, k)) for k in range(0, 4) for _ in range(20)
+]
+
+
+def _seeded_rng(seed: Optional[np.random.SeedSequence]) -> np.random.Generator:
+    """Seed `random` and Faker from `seed` and return a numpy generator on the same stream.
+
+    Forked pool workers inherit the parent's generator state, so each task gets its
+    own SeedSequence child to keep the workers' streams independent.
+    """
+    seed = seed if seed is not None else np.random.SeedSequence()
+    py_seed, faker_seed = (int(x) for x in seed.generate_state(2))
+    random.seed(py_seed)
+    fake.seed_instance(faker_seed)
+    return np.random.default_rng(seed)
 
-def generate_employees(count: int = 50) -> List[EmployeeTable]:
+
+def generate_employees(count: int = 50, seed: Optional[np.random.SeedSequence] = None) -> List[Dict[str, Any]]:
     """Generate synthetic employee data"""
+    _seeded_rng(seed)
     employees = []
     
     for i in range(count):
         hire_date = fake.date_between(start_date='-5y', end_date='today')
         tenure_months = (date.today() - hire_date).days // 30
         
-        employee = EmployeeTable(
+        employee = dict(
             employee_id=str(uuid.uuid4()),
             first_name=fake.first_name(),
             last_name=fake.last_name(),
@@ -175,8 +202,9 @@ def generate_employees(count: int = 50) -> List[EmployeeTable]:
     return employees
 
 
-def generate_storage_items(count: int = 100) -> List[StorageItemTable]:
+def generate_storage_items(count: int = 100, seed: Optional[np.random.SeedSequence] = None) -> List[Dict[str, Any]]:
     """Generate synthetic storage/inventory data"""
+    _seeded_rng(seed)
     storage_items = []
     
     for category, ingredients in INGREDIENTS_BY_CATEGORY.items():
@@ -190,7 +218,7 @@ def generate_storage_items(count: int = 100) -> List[StorageItemTable]:
             if category in ["meat", "seafood", "dairy", "fruits"]:
                 expiry_date = fake.date_between(start_date='today', end_date='+30d')
             
-            item = StorageItemTable(
+            item = dict(
                 item_id=str(uuid.uuid4()),
                 item_name=ingredient,
                 category=category,
@@ -212,8 +240,11 @@ def generate_storage_items(count: int = 100) -> List[StorageItemTable]:
     return storage_items
 
 
-def generate_recipes_and_ingredients(storage_items: List[StorageItemTable], count: int = 60) -> tuple:
+def generate_recipes_and_ingredients(
+    storage_items: List[Dict[str, Any]], count: int = 60, seed: Optional[np.random.SeedSequence] = None
+) -> tuple:
     """Generate synthetic recipe data with ingredients"""
+    rng = _seeded_rng(seed)
     recipes = []
     recipe_ingredients = []
     
@@ -227,13 +258,11 @@ def generate_recipes_and_ingredients(storage_items: List[StorageItemTable], coun
             difficulty = random.randint(1, 5)
             serving_size = random.randint(2, 8)
             
-            # Generate cooking instructions
-            instructions = random.sample(COOKING_INSTRUCTIONS, random.randint(4, 8))
-            
-            # Generate allergens
-            allergens = random.sample(COMMON_ALLERGENS, random.randint(0, 3))
+            # Pick cooking instructions and allergens from the shared pools
+            instructions = random.choice(_INSTR_POOLS)
+            allergens = random.choice(_ALLERGEN_POOLS)
             
-            recipe = RecipeTable(
+            recipe = dict(
                 recipe_id=recipe_id,
                 dish_name=dish,
                 category=random.choice(FOOD_CATEGORIES),
@@ -259,6 +288,7 @@ def generate_recipes_and_ingredients(storage_items: List[StorageItemTable], coun
             # Generate recipe ingredients (3-8 ingredients per recipe)
             num_ingredients = random.randint(3, 8)
             selected_items = random.sample(storage_items, num_ingredients)
+            has_notes = rng.random(num_ingredients) < 0.3
             total_percentage = 0
             
             for i, storage_item in enumerate(selected_items):
@@ -268,27 +298,36 @@ def generate_recipes_and_ingredients(storage_items: List[StorageItemTable], coun
                     percentage = random.uniform(5, 30)
                     total_percentage += percentage
                 
-                ingredient = RecipeIngredientTable(
+                ingredient = dict(
                     id=str(uuid.uuid4()),
                     recipe_id=recipe_id,
-                    ingredient_id=storage_item.item_id,
-                    ingredient_name=storage_item.item_name,
+                    ingredient_id=storage_item["item_id"],
+                    ingredient_name=storage_item["item_name"],
                     quantity=Decimal(str(random.uniform(0.1, 3.0))),
-                    unit=storage_item.unit,
+                    unit=storage_item["unit"],
                     percentage=round(percentage, 1),
                     timing=random.choice(["prep", "start", "middle", "end", "garnish"]),
-                    notes=fake.text(max_nb_chars=100) if random.random() < 0.3 else None
+                    notes=fake.text(max_nb_chars=100) if has_notes[i] else None
                 )
                 recipe_ingredients.append(ingredient)
     
     return recipes, recipe_ingredients
 
 
-def generate_daily_menus(recipes: List[RecipeTable], days: int = 7) -> tuple:
+def generate_daily_menus(
+    recipes: List[Dict[str, Any]], days: int = 7, seed: Optional[np.random.SeedSequence] = None
+) -> tuple:
     """Generate daily menus for multiple days and locations"""
+    rng = _seeded_rng(seed)
     daily_menus = []
     daily_menu_items = []
     
+    # One uniform draw per column for the menu-level gates
+    num_menus = days * len(RESTAURANT_LOCATIONS)
+    has_offers = rng.random(num_menus) < 0.7
+    has_recommendation = rng.random(num_menus) < 0.8
+    menu_idx = 0
+    
     for day_offset in range(days):
         menu_date = date.today() + timedelta(days=day_offset)
         
@@ -297,8 +336,14 @@ def generate_daily_menus(recipes: List[RecipeTable], days: int = 7) -> tuple:
             
             # Select random recipes for this menu (15-25 items)
             selected_recipes = random.sample(recipes, random.randint(15, 25))
+            n = len(selected_recipes)
+            has_quantity = rng.random(n) < 0.3
+            has_spice = rng.random(n) < 0.4
+            vegetarian = rng.random(n) < 0.3
+            vegan = rng.random(n) < 0.15
+            gluten_free = rng.random(n) < 0.2
             
-            daily_menu = DailyMenuTable(
+            daily_menu = dict(
                 menu_id=menu_id,
                 menu_date=menu_date,
                 restaurant_location=location,
@@ -306,38 +351,50 @@ def generate_daily_menus(recipes: List[RecipeTable], days: int = 7) -> tuple:
                     "Happy Hour 4-6 PM: 20% off appetizers",
                     "Chef's Special: Seasonal ingredients",
                     "Weekend Brunch: Available Saturday & Sunday"
-                ] if random.random() < 0.7 else [],
-                chef_recommendation=random.choice(selected_recipes).dish_name if random.random() < 0.8 else None,
+                ] if has_offers[menu_idx] else [],
+                chef_recommendation=random.choice(selected_recipes)["dish_name"] if has_recommendation[menu_idx] else None,
                 total_items=len(selected_recipes),
                 created_at=datetime.now(),
                 updated_at=datetime.now()
             )
             daily_menus.append(daily_menu)
+            menu_idx += 1
             
             # Generate menu items
-            for recipe in selected_recipes:
-                menu_item = DailyMenuItemTable(
+            for j, recipe in enumerate(selected_recipes):
+                menu_item = dict(
                     menu_item_id=str(uuid.uuid4()),
                     menu_id=menu_id,
-                    recipe_id=recipe.recipe_id,
-                    dish_name=recipe.dish_name,
+                    recipe_id=recipe["recipe_id"],
+                    dish_name=recipe["dish_name"],
                     description=fake.text(max_nb_chars=150),
-                    category=recipe.category,
+                    category=recipe["category"],
                     price=Decimal(str(random.uniform(8.99, 35.99))),
                     status=random.choice(["available", "available", "available", "limited", "sold_out"]),
-                    estimated_prep_time=recipe.prep_time_minutes + recipe.cook_time_minutes,
-                    available_quantity=random.randint(5, 20) if random.random() < 0.3 else None,
-                    spicy_level=random.randint(1, 5) if random.random() < 0.4 else None,
-                    is_vegetarian=random.random() < 0.3,
-                    is_vegan=random.random() < 0.15,
-                    is_gluten_free=random.random() < 0.2,
-                    calories=recipe.nutritional_info.get("calories") if recipe.nutritional_info else None
+                    estimated_prep_time=recipe["prep_time_minutes"] + recipe["cook_time_minutes"],
+                    available_quantity=random.randint(5, 20) if has_quantity[j] else None,
+                    spicy_level=random.randint(1, 5) if has_spice[j] else None,
+                    is_vegetarian=bool(vegetarian[j]),
+                    is_vegan=bool(vegan[j]),
+                    is_gluten_free=bool(gluten_free[j]),
+                    calories=recipe["nutritional_info"].get("calories") if recipe["nutritional_info"] else None
                 )
                 daily_menu_items.append(menu_item)
     
     return daily_menus, daily_menu_items
 
 
+# Child tables first so foreign keys are never violated mid-statement
+CLEAR_TABLES_SQL = """
+DELETE FROM daily_menu_items;
+DELETE FROM daily_menus;
+DELETE FROM recipe_ingredients;
+DELETE FROM recipes;
+DELETE FROM storage_items;
+DELETE FROM employees;
+"""
+
+
 def populate_database():
     """Main function to populate the database with synthetic data"""
     logger.info("🚀 Starting database population with synthetic data...")
@@ -351,62 +408,71 @@ def populate_database():
     try:
         # Clear existing data (for development)
         logger.info("🧹 Clearing existing data...")
-        db.query(DailyMenuItemTable).delete()
-        db.query(DailyMenuTable).delete()
-        db.query(RecipeIngredientTable).delete()
-        db.query(RecipeTable).delete()
-        db.query(StorageItemTable).delete()
-        db.query(EmployeeTable).delete()
-        db.commit()
-        
-        # Generate employees
-        logger.info("👥 Generating employee data...")
-        employees = generate_employees(50)
-        db.add_all(employees)
-        db.commit()
-        logger.info(f"✅ Created {len(employees)} employees")
-        
-        # Generate storage items
-        logger.info("📦 Generating storage/inventory data...")
-        storage_items = generate_storage_items()
-        db.add_all(storage_items)
-        db.commit()
-        logger.info(f"✅ Created {len(storage_items)} storage items")
+        with db.begin():
+            db.execute(text(CLEAR_TABLES_SQL))
         
-        # Generate recipes and ingredients
-        logger.info("👨‍🍳 Generating recipes and ingredients...")
-        recipes, recipe_ingredients = generate_recipes_and_ingredients(storage_items)
-        db.add_all(recipes)
-        db.commit()
-        db.add_all(recipe_ingredients)
-        db.commit()
-        logger.info(f"✅ Created {len(recipes)} recipes with {len(recipe_ingredients)} ingredients")
-        
-        # Generate daily menus
-        logger.info("🍽️ Generating daily menus...")
-        daily_menus, daily_menu_items = generate_daily_menus(recipes, 7)
-        db.add_all(daily_menus)
-        db.commit()
-        db.add_all(daily_menu_items)
-        db.commit()
-        logger.info(f"✅ Created {len(daily_menus)} daily menus with {len(daily_menu_items)} menu items")
+        # Generators run in worker processes while the main process writes
+        # finished batches. Workers return plain dicts and each task gets its
+        # own seed, so the ORM objects are only ever built here.
+        seeds = iter(np.random.SeedSequence().spawn(4))
+        # Spawn rather than fork: the parent already runs loguru's queue threads,
+        # and forking while they hold a lock can deadlock the children
+        spawn = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=4, mp_context=spawn) as pool:
+            logger.info("👥 Generating employee data...")
+            employees_future = pool.submit(generate_employees, 50, next(seeds))
+            logger.info("📦 Generating storage/inventory data...")
+            storage_future = pool.submit(generate_storage_items, 100, next(seeds))
+            
+            storage_items = storage_future.result()
+            logger.info("👨‍🍳 Generating recipes and ingredients...")
+            recipes_future = pool.submit(generate_recipes_and_ingredients, storage_items, 60, next(seeds))
+            
+            employees = employees_future.result()
+            db.add_all([EmployeeTable(**row) for row in employees])
+            db.commit()
+            logger.info("✅ Created {} employees", len(employees))
+            
+            db.add_all([StorageItemTable(**row) for row in storage_items])
+            db.commit()
+            logger.info("✅ Created {} storage items", len(storage_items))
+            
+            recipes, recipe_ingredients = recipes_future.result()
+            logger.info("🍽️ Generating daily menus...")
+            menus_future = pool.submit(generate_daily_menus, recipes, 7, next(seeds))
+            
+            db.add_all([RecipeTable(**row) for row in recipes])
+            db.commit()
+            db.add_all([RecipeIngredientTable(**row) for row in recipe_ingredients])
+            db.commit()
+            logger.info("✅ Created {} recipes with {} ingredients", len(recipes), len(recipe_ingredients))
+            
+            daily_menus, daily_menu_items = menus_future.result()
+            db.add_all([DailyMenuTable(**row) for row in daily_menus])
+            db.commit()
+            db.add_all([DailyMenuItemTable(**row) for row in daily_menu_items])
+            db.commit()
+            logger.info("✅ Created {} daily menus with {} menu items", len(daily_menus), len(daily_menu_items))
         
         logger.info("🎉 Database population completed successfully!")
         
-        # Print summary
-        print("\n" + "="*60)
-        print("📊 DATABASE POPULATION SUMMARY")
-        print("="*60)
-        print(f"👥 Employees: {len(employees)}")
-        print(f"📦 Storage Items: {len(storage_items)}")
-        print(f"👨‍🍳 Recipes: {len(recipes)}")
-        print(f"🥘 Recipe Ingredients: {len(recipe_ingredients)}")
-        print(f"🍽️ Daily Menus: {len(daily_menus)}")
-        print(f"📋 Menu Items: {len(daily_menu_items)}")
-        print("="*60)
+        # Print summary in a single write
+        summary = "\n".join([
+            "\n" + "="*60,
+            "📊 DATABASE POPULATION SUMMARY",
+            "="*60,
+            f"👥 Employees: {len(employees)}",
+            f"📦 Storage Items: {len(storage_items)}",
+            f"👨‍🍳 Recipes: {len(recipes)}",
+            f"🥘 Recipe Ingredients: {len(recipe_ingredients)}",
+            f"🍽️ Daily Menus: {len(daily_menus)}",
+            f"📋 Menu Items: {len(daily_menu_items)}",
+            "="*60,
+        ])
+        print(summary)
         
     except Exception as e:
-        logger.error(f"❌ Error populating database: {str(e)}")
+        logger.error("❌ Error populating database: {}", e)
         db.rollback()
         raise
     finally:
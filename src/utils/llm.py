@@ -1,4 +1,3 @@
-from langchain_groq import ChatGroq
 from langchain_openai import ChatOpenAI
 from src.configs.config import get_settings
 
@@ -13,6 +12,8 @@ llm = ChatOpenAI(
 )
 
 
+# Import Groq lazily here if it is re-enabled; it is slow to import and unused otherwise.
+# from langchain_groq import ChatGroq
 # llm = ChatGroq(
 #     api_key=_settings.groq_api_key,
 #     model=_settings.model_name,
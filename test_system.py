@@ -4,6 +4,7 @@ Test script for Restaurant CRM Chat Applications
 Quick verification that all components are working correctly.
 """
 
+import asyncio
 import os
 import sys
 from dotenv import load_dotenv
@@ -11,8 +12,9 @@ from dotenv import load_dotenv
 # Add src to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from src.agent.chat_agents import run_internal_chat, run_external_chat
-from src.db_models.database import SessionLocal, EmployeeTable, StorageItemTable, RecipeTable, DailyMenuTable
+from src.agent.chat_agents import run_internal_chat_async, run_external_chat_async
+from sqlalchemy import func, select
+from src.db_models.database import get_db, EmployeeTable, StorageItemTable, RecipeTable, DailyMenuTable
 from src.utils.app_logging import setup_logger, enable_console_logging
 
 # Load environment variables
@@ -22,20 +24,23 @@ enable_console_logging()  # Show logs during tests in terminal
 logger = setup_logger()
 
 
+def count_of(table):
+    return select(func.count()).select_from(table).scalar_subquery()
+
+
 def test_database_connection():
     """Test database connectivity and data presence"""
     print("🗄️ Testing database connection...")
     
     try:
-        db = SessionLocal()
-        
-        # Count records in each table
-        employee_count = db.query(EmployeeTable).count()
-        storage_count = db.query(StorageItemTable).count()
-        recipe_count = db.query(RecipeTable).count()
-        menu_count = db.query(DailyMenuTable).count()
-        
-        db.close()
+        # Count records in each table with one round trip
+        with get_db() as db:
+            employee_count, storage_count, recipe_count, menu_count = db.execute(select(
+                count_of(EmployeeTable),
+                count_of(StorageItemTable),
+                count_of(RecipeTable),
+                count_of(DailyMenuTable),
+            )).one()
         
         print(f"✅ Database connected successfully!")
         print(f"   📊 Records found:")
@@ -55,7 +60,31 @@ def test_database_connection():
         return False
 
 
-def test_internal_chat():
+async def _run_chat_probes(label: str, run_chat, queries, thread_prefix: str) -> bool:
+    """Send all queries concurrently and report each response as it lands"""
+    async def probe(i, query):
+        # One thread per query so concurrent turns never share checkpoint state
+        return query, await run_chat(query, f"{thread_prefix}_{i}")
+
+    ok = True
+    for next_done in asyncio.as_completed([probe(i, q) for i, q in enumerate(queries)]):
+        try:
+            query, response = await next_done
+        except Exception as e:
+            print(f"❌ {label} chat error: {str(e)}")
+            ok = False
+            continue
+        print(f"\n📝 Query: {query}")
+        print(f"✅ Response received (length: {len(response)} chars)")
+
+        # Show first 100 characters of response
+        preview = response[:100] + "..." if len(response) > 100 else response
+        print(f"📄 Preview: {preview}")
+
+    return ok
+
+
+async def test_internal_chat():
     """Test internal staff chat functionality"""
     print("\n🏪 Testing internal staff chat...")
     
@@ -65,24 +94,10 @@ def test_internal_chat():
         "What recipes use chicken?"
     ]
     
-    for query in test_queries:
-        try:
-            print(f"\n📝 Query: {query}")
-            response = run_internal_chat(query, "test_internal")
-            print(f"✅ Response received (length: {len(response)} chars)")
-            
-            # Show first 100 characters of response
-            preview = response[:100] + "..." if len(response) > 100 else response
-            print(f"📄 Preview: {preview}")
-            
-        except Exception as e:
-            print(f"❌ Internal chat error: {str(e)}")
-            return False
-    
-    return True
+    return await _run_chat_probes("Internal", run_internal_chat_async, test_queries, "test_internal")
 
 
-def test_external_chat():
+async def test_external_chat():
     """Test external customer chat functionality"""
     print("\n🍽️ Testing customer chat...")
     
@@ -92,21 +107,12 @@ def test_external_chat():
         "Tell me about your desserts"
     ]
     
-    for query in test_queries:
-        try:
-            print(f"\n📝 Query: {query}")
-            response = run_external_chat(query, "test_external")
-            print(f"✅ Response received (length: {len(response)} chars)")
-            
-            # Show first 100 characters of response
-            preview = response[:100] + "..." if len(response) > 100 else response
-            print(f"📄 Preview: {preview}")
-            
-        except Exception as e:
-            print(f"❌ External chat error: {str(e)}")
-            return False
-    
-    return True
+    return await _run_chat_probes("External", run_external_chat_async, test_queries, "test_external")
+
+
+async def _test_chats():
+    # Both chat suites run concurrently; total time is roughly the slowest single turn
+    return await asyncio.gather(test_internal_chat(), test_external_chat())
 
 
 def main():
@@ -120,11 +126,8 @@ def main():
         print("\n❌ Database tests failed. Please run setup.py first.")
         return
     
-    # Test internal chat
-    internal_ok = test_internal_chat()
-    
-    # Test external chat
-    external_ok = test_external_chat()
+    # Test internal and external chat
+    internal_ok, external_ok = asyncio.run(_test_chats())
     
     # Summary
     print("\n" + "="*50)